@@ -377,6 +377,28 @@ create_dispatcher() {
     print_color "$GREEN" "✅ Dispatcher created at: $dispatcher_path"
 }
 
+stop_daemon() {
+    # A running intent daemon keeps serving the code it loaded; ask it to exit once idle
+    local socket_path="${XDG_RUNTIME_DIR:+$XDG_RUNTIME_DIR/claude-intent.sock}"
+    socket_path="${socket_path:-$CLAUDE_DIR/intent.sock}"
+    [[ -S "$socket_path" ]] || return 0
+    
+    if python3 - "$socket_path" << 'EOF'
+import json, socket, sys
+try:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2)
+        sock.connect(sys.argv[1])
+        sock.sendall(json.dumps({'shutdown': True}).encode() + b"\n")
+        sock.recv(64)
+except OSError:
+    sys.exit(1)  # Stale socket; no daemon is running
+EOF
+    then
+        print_color "$YELLOW" "🔄 Stopping the running intent daemon (it exits after in-flight hooks finish)"
+    fi
+}
+
 install_variant() {
     local variant_key=$1
     local variant_info
@@ -403,6 +425,14 @@ install_variant() {
     cp "$source_file" "$dest_file"
     chmod +x "$dest_file"
     
+    # Companion daemon (e.g. track-intent-daemon.py) is optional but lives beside its hook
+    local daemon_file="$SCRIPT_DIR/${filename%.py}-daemon.py"
+    if [[ -f "$daemon_file" ]]; then
+        cp "$daemon_file" "$HOOKS_DIR/"
+        chmod +x "$HOOKS_DIR/$(basename "$daemon_file")"
+        stop_daemon
+    fi
+    
     print_color "$GREEN" "✅ Installed $title to: $dest_file"
 }
 
@@ -713,9 +743,12 @@ remove_installation() {
         exit 0
     fi
     
+    stop_daemon
+    
     # Remove hook files
     if [[ -d "$HOOKS_DIR" ]]; then
         find "$HOOKS_DIR" -name "track-intent.py" -delete 2>/dev/null || true
+        find "$HOOKS_DIR" -name "track-intent-daemon.py" -delete 2>/dev/null || true
         find "$HOOKS_DIR" -name "variant-*.py" -delete 2>/dev/null || true
         find "$HOOKS_DIR" -name "ccc-dispatcher.py" -delete 2>/dev/null || true
     fi
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Claude Intent Tracker Daemon
+Keeps the intent tracker loaded in a long-lived process so hook runs skip interpreter
+startup, and the transcript parse cache and Claude CLI path stay warm in memory.
+
+track-intent.py connects to the UNIX socket on every Stop/SubagentStop event. When no
+daemon is listening it starts one in the background, and does the work itself if the
+daemon doesn't come up in time (or CLAUDE_INTENT_DAEMON=0 disables it). It can also be
+started by hand, from a login script, or as a systemd user service:
+
+    python3 ~/.claude/hooks/track-intent-daemon.py &
+
+The daemon exits on its own after IDLE_TIMEOUT_SECONDS without requests. It also
+exits when track-intent.py or this script changes on disk (or install.sh asks it to
+stop): it turns new requests away so their hooks run the new code in-process, and
+leaves once in-flight requests finish; the next hook run starts a fresh daemon.
+"""
+
+import asyncio
+import fcntl
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+# Configuration
+IDLE_TIMEOUT_SECONDS = 600  # Exit after 10 minutes without hook events
+IDLE_CHECK_SECONDS = 30
+MAX_REQUEST_BYTES = 1024 * 1024
+DAEMON_PATH = Path(__file__).resolve()
+TRACKER_PATH = DAEMON_PATH.with_name("track-intent.py")
+
+def source_version() -> Optional[Tuple[int, ...]]:
+    """Modification times of the daemon and tracker sources; None if either is gone."""
+    try:
+        return tuple(os.stat(path).st_mtime_ns for path in (DAEMON_PATH, TRACKER_PATH))
+    except OSError:
+        return None
+
+def load_tracker() -> Any:
+    """Import track-intent.py from alongside this script."""
+    spec = importlib.util.spec_from_file_location("track_intent", TRACKER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class IntentDaemon:
+    """Serves hook events over a UNIX socket, one JSON request per connection."""
+    
+    def __init__(self, tracker: Any, version: Optional[Tuple[int, ...]]):
+        self.tracker = tracker
+        self.version = version  # source_version() when the tracker was loaded
+        self.outdated = False  # Set once the sources change or a shutdown is requested
+        self.drained = None  # asyncio.Event, set when outdated and no request is in flight
+        self.socket_path = tracker.DAEMON_SOCKET
+        self.lock_path = self.socket_path.with_name(self.socket_path.name + ".lock")
+        self.active_requests = 0
+        self.last_activity = time.monotonic()
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run one hook event and reply with the generated intent."""
+        self.active_requests += 1
+        try:
+            line = await reader.readline()
+            if not line:
+                return  # Connected and closed without a request, e.g. a liveness probe
+            request = json.loads(line)
+            if request.get('shutdown') or source_version() != self.version:
+                self.outdated = True
+            if self.outdated:
+                # Stale code: the client runs the event itself, and we exit once drained
+                writer.write(json.dumps({'outdated': True}).encode() + b"\n")
+                await writer.drain()
+                return
+            loop = asyncio.get_running_loop()
+            # run_hook blocks on git and the Claude CLI; keep the loop free for other sessions
+            intent = await loop.run_in_executor(
+                None, self.tracker.run_hook, request.get('input', {}), request.get('cwd'),
+                request.get('env')
+            )
+            writer.write(json.dumps({'intent': intent}).encode() + b"\n")
+            await writer.drain()
+        except Exception as e:
+            self.tracker.log_hook_error(e)
+        finally:
+            self.active_requests -= 1
+            self.last_activity = time.monotonic()
+            writer.close()
+            if self.outdated and self.active_requests == 0:
+                self.drained.set()
+    
+    async def wait_until_idle(self):
+        """Return once no request has arrived for IDLE_TIMEOUT_SECONDS, or once outdated and drained."""
+        while True:
+            try:
+                await asyncio.wait_for(self.drained.wait(), IDLE_CHECK_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                pass
+            idle_for = time.monotonic() - self.last_activity
+            if self.active_requests == 0 and idle_for >= IDLE_TIMEOUT_SECONDS:
+                return
+    
+    def acquire_lock(self) -> Any:
+        """Take the single-daemon lock, held until serve() returns; None if another daemon has it."""
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+    
+    async def serve(self):
+        """Listen until idle, then clean up the socket."""
+        self.socket_path.parent.mkdir(exist_ok=True)
+        lock_file = self.acquire_lock()
+        if lock_file is None:
+            return
+        
+        self.drained = asyncio.Event()  # Created here so it belongs to the running loop
+        
+        # Holding the lock, any socket file at the path is a dead daemon's; the server replaces it
+        old_umask = os.umask(0o077)  # Only our user may connect
+        try:
+            server = await asyncio.start_unix_server(
+                self.handle_client, path=str(self.socket_path), limit=MAX_REQUEST_BYTES
+            )
+        finally:
+            os.umask(old_umask)
+        socket_ino = os.stat(self.socket_path).st_ino
+        
+        try:
+            await self.wait_until_idle()
+        finally:
+            server.close()
+            await server.wait_closed()
+            # Remove the socket before releasing the lock, and only if it is still ours
+            try:
+                if os.stat(self.socket_path).st_ino == socket_ino:
+                    self.socket_path.unlink()
+            except OSError:
+                pass
+            lock_file.close()
+
+def main():
+    """Start the daemon."""
+    try:
+        version = source_version()  # Taken first, so an edit made mid-import still counts
+        asyncio.run(IntentDaemon(load_tracker(), version).serve())
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -8,26 +8,81 @@ Uses smart boundary detection, content filtering, and marker injection for optim
 import json
 import sys
 import os
-import subprocess
-import hashlib
+import time
+import mmap
+import struct
 from pathlib import Path
-from datetime import datetime, timedelta
 import re
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Mapping, Optional, Tuple, Any
+
+# Transcript JSON parser, resolved on first use by _json_parser()
+_json = None
 
 
 # Configuration
 INTENT_FILE = ".git/CLAUDE_INTENT"
 INTENT_CACHE_FILE = ".git/CLAUDE_INTENT_CACHE"
 BOUNDARY_MARKER_FILE = ".git/CLAUDE_LAST_BOUNDARY"
+PARSE_CACHE_FILE = ".git/CLAUDE_INTENT_PARSE_CACHE"
+CLI_PATH_CACHE_FILE = ".git/CLAUDE_CLI_PATH"
 HAIKU_MODEL = "claude-3-5-haiku-latest"
 
+# Intent daemon (track-intent-daemon.py) keeps a warm interpreter between hook runs;
+# the hook starts it on first use unless CLAUDE_INTENT_DAEMON=0
+DAEMON_SCRIPT = Path(__file__).resolve().with_name("track-intent-daemon.py")
+DAEMON_SOCKET = (Path(os.environ['XDG_RUNTIME_DIR']) / "claude-intent.sock"
+                 if os.environ.get('XDG_RUNTIME_DIR') else Path.home() / ".claude" / "intent.sock")
+DAEMON_CONNECT_TIMEOUT_SECONDS = 0.5
+DAEMON_STARTUP_WAIT_SECONDS = 1.0  # How long a freshly started daemon gets to start listening
+DAEMON_RESPONSE_TIMEOUT_SECONDS = 960  # Covers the Claude CLI's 300s + 600s retry
+
 # Smart limits
 MAX_LOOKBACK_ENTRIES = 500  # Absolute maximum to scan
 TARGET_CONTEXT_TOKENS = 2000  # Target ~2K tokens
 MAX_CONTEXT_TOKENS = 3000  # Hard limit ~3K tokens
 CACHE_DURATION_SECONDS = 30  # Rate limiting
+CACHE_RECORD = struct.Struct('<d16s')  # Intent cache: last update time, 16-byte context digest
 BOUNDARY_MARKER = "===INTENT_BOUNDARY==="
+TOOL_RESULT_HEAD_CHARS = 500  # Tool output kept in the parse cache
+PARSE_CACHE_FINGERPRINT_BYTES = 256  # Bytes before the cached offset that must still match
+ERROR_SCAN_CHARS = 200  # Head of a tool result checked for error text
+
+# Tool inputs read by classify_content; everything else (file contents, diffs) is dropped
+SLIM_INPUT_KEYS = ('subagent_type', 'description', 'prompt', 'file_path',
+                   'notebook_path', 'todos', 'command')
+
+# Claude CLI locations to try, in priority order
+CLAUDE_CLI_CANDIDATES = (
+    # Claude Code native binary locations
+    Path.home() / ".claude" / "local" / "claude",  # Claude Code default
+    Path.home() / ".claude" / "bin" / "claude",  # Alternative Claude Code location
+    
+    # npm global installations (user-specific)
+    Path.home() / ".npm-global" / "bin" / "claude",  # Recommended npm global
+    Path.home() / ".npm" / "bin" / "claude",  # Alternative npm location
+    Path.home() / "node_modules" / ".bin" / "claude",  # Local npm
+    
+    # yarn/pnpm global installations
+    Path.home() / ".yarn" / "bin" / "claude",  # Yarn global
+    Path.home() / ".local" / "share" / "pnpm" / "claude",  # pnpm global
+    
+    # System-wide installations
+    Path("/usr/local/bin/claude"),  # Common system install
+    Path("/usr/bin/claude"),  # System package manager
+    
+    # Homebrew installations
+    Path("/opt/homebrew/bin/claude"),  # Homebrew on Apple Silicon
+    Path("/usr/local/Cellar/node") / "*" / "bin" / "claude",  # Homebrew node
+    
+    # Windows WSL paths
+    Path("/mnt/c/Program Files/nodejs/claude"),  # Windows via WSL
+    Path.home() / "AppData" / "Roaming" / "npm" / "claude",  # Windows npm
+)
+
+# Precompiled text classifiers (case-insensitive substring matches)
+ACKNOWLEDGMENT_PATTERN = re.compile(r'sure|ok|will|let me', re.IGNORECASE)
+SUMMARY_PATTERN = re.compile(r'decided|conclusion|summary|completed|finished|implemented', re.IGNORECASE)
+COMMIT_MESSAGE_PATTERN = re.compile(r'-m\s+"[^"]*"')
 
 # Content relevance scores
 RELEVANCE_SCORES = {
@@ -44,140 +99,411 @@ RELEVANCE_SCORES = {
     'verbose_output': 0
 }
 
-def get_project_root() -> Path:
-    """Find the git project root from current directory."""
-    cwd = Path(os.getcwd())
-    for parent in [cwd] + list(cwd.parents):
-        if (parent / ".git").exists():
-            return parent
-    return cwd
-
-def find_last_boundary_marker(lines: List[str]) -> Optional[int]:
-    """Find the most recent boundary marker in transcript."""
-    for i, line in enumerate(reversed(lines)):
-        try:
-            data = json.loads(line.strip())
-            
-            # Handle new format with nested message
-            if 'message' in data and isinstance(data['message'], dict):
-                message = data['message']
-                if message.get('role') == 'assistant':
-                    content = message.get('content', [])
-                    if isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict) and item.get('type') == 'text':
-                                if BOUNDARY_MARKER in item.get('text', ''):
-                                    return len(lines) - i - 1
-            
-            # Legacy format compatibility
-            elif data.get('type') == 'assistant':
-                content = data.get('content', [])
-                if isinstance(content, list):
-                    for item in content:
-                        if isinstance(item, dict) and item.get('type') == 'text':
-                            if BOUNDARY_MARKER in item.get('text', ''):
-                                return len(lines) - i - 1
-        except:
-            continue
-    return None
+# Project roots already found by this process (the daemon serves many hook runs), keyed by cwd
+_project_root_memo: Dict[str, Path] = {}
+
+def get_project_root(cwd: Optional[str] = None) -> Path:
+    """Find the git project root from the given (default: current) directory."""
+    cwd = cwd or os.getcwd()
+    root = _project_root_memo.get(cwd)
+    if root is not None:
+        return root
+    
+    # Walk up with plain string paths; one stat per level
+    path = cwd
+    while True:
+        if os.path.exists(os.path.join(path, '.git')):
+            root = _project_root_memo[cwd] = Path(path)  # Only hits; a repo may be created later
+            return root
+        parent = os.path.dirname(path)
+        if parent == path:
+            return Path(cwd)
+        path = parent
+
+def _slim_content(content: Any) -> Any:
+    """Reduce message content to the fields boundary detection and classification read."""
+    if not isinstance(content, list):
+        return content
+    
+    slim = []
+    for item in content:
+        if isinstance(item, dict):
+            item_type = item.get('type')
+            if item_type == 'tool_use':
+                input_data = item.get('input', {})
+                if isinstance(input_data, dict):
+                    input_data = {k: input_data[k] for k in SLIM_INPUT_KEYS if k in input_data}
+                item = {'type': item_type, 'name': item.get('name', ''), 'input': input_data}
+            elif item_type == 'tool_result':
+                item = {'type': item_type, 'content': _slim_result(item.get('content', ''))}
+            else:
+                item = {k: item[k] for k in ('type', 'text') if k in item}
+        slim.append(item)
+    return slim
+
+def _slim_result(content: Any) -> Any:
+    """Keep only the head of tool output; nothing past the first lines is ever inspected."""
+    if isinstance(content, str):
+        return content[:TOOL_RESULT_HEAD_CHARS]
+    if isinstance(content, list):
+        slim = []
+        for item in content:
+            if isinstance(item, str):
+                item = item[:TOOL_RESULT_HEAD_CHARS]
+            elif isinstance(item, dict):
+                item = {k: item[k] for k in ('type', 'text') if k in item}
+                if isinstance(item.get('text'), str):
+                    item['text'] = item['text'][:TOOL_RESULT_HEAD_CHARS]
+            slim.append(item)
+        return slim
+    return content
 
-def find_git_commit_boundary(lines: List[str]) -> Optional[int]:
-    """Find the most recent successful git commit in transcript."""
-    commit_command_idx = None
+def _slim_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop transcript fields we never look at so entries stay small in the parse cache."""
+    slim = {}
+    for key in ('type', 'content', 'toolResult'):
+        if key in data:
+            slim[key] = data[key]
+    if 'content' in slim:
+        slim['content'] = _slim_content(slim['content'])
+    if isinstance(slim.get('toolResult'), dict):
+        slim['toolResult'] = {'content': _slim_result(slim['toolResult'].get('content', ''))}
     
-    for i, line in enumerate(reversed(lines)):
+    message = data.get('message')
+    if isinstance(message, dict):
+        slim['message'] = {
+            'role': message.get('role', ''),
+            'content': _slim_content(message.get('content', '')),
+        }
+    elif 'message' in data:
+        slim['message'] = message
+    return slim
+
+def _json_parser() -> Any:
+    """Return orjson if installed, else the stdlib json module.
+
+    orjson parses straight from bytes and is much faster on the transcript
+    scan, but importing it costs more than the hook's no-op paths take, so
+    it is only loaded once a transcript actually needs parsing.
+    """
+    global _json
+    if _json is None:
         try:
-            data = json.loads(line.strip())
-            
-            # Handle new format with nested message
-            message = data.get('message', data)  # Fallback to data for legacy
-            
-            # Look for git commit command execution
-            if message.get('role') == 'assistant' or data.get('type') == 'assistant':
-                content = message.get('content', [])
-                if isinstance(content, list):
-                    for item in content:
-                        if item.get('type') == 'tool_use' and item.get('name') == 'Bash':
-                            command = item.get('input', {}).get('command', '')
-                            if 'git commit' in command and '-m' in command:
-                                commit_command_idx = len(lines) - i - 1
-                                # Look ahead for the result
-                                if i > 0:  # Check next entry for success
-                                    next_idx = len(lines) - i
-                                    if next_idx < len(lines):
-                                        try:
-                                            next_data = json.loads(lines[next_idx].strip())
-                                            next_message = next_data.get('message', next_data)
-                                            if (next_message.get('role') == 'user' and 
-                                                any('tool_result' in str(content) for content in next_message.get('content', []))):
-                                                # This is a tool result, check if commit succeeded
-                                                result_content = next_message.get('content', [])
-                                                if isinstance(result_content, list):
-                                                    for result_item in result_content:
-                                                        if isinstance(result_item, dict) and result_item.get('type') == 'tool_result':
-                                                            result_text = str(result_item.get('content', ''))
-                                                            if '[' in result_text and ']' in result_text:
-                                                                # Looks like a successful commit
-                                                                return commit_command_idx
-                                        except:
-                                            pass
-        except:
-            continue
+            import orjson as parser
+        except ImportError:
+            parser = json
+        _json = parser
+    return _json
+
+def _parse_entry(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one transcript line into a slim entry, or None if it isn't usable."""
+    # Every entry is a JSON object; blank lines and half-written tail lines are
+    # rejected here rather than by raising inside the decoder
+    line = line.strip()
+    if line[:1] != b'{' or line[-1:] != b'}':
+        return None
+    try:
+        data = _json_parser().loads(line)
+    except ValueError:  # JSONDecodeError in both orjson and json
+        return None
+    if not isinstance(data, dict):
+        return None
+    return _slim_entry(data)
+
+# Parse caches already loaded by this process, keyed by cache file
+_parse_cache_memo: Dict[Path, Dict[str, Any]] = {}
+
+def _tail_start(mm: mmap.mmap, floor: int, end: int, max_lines: int) -> int:
+    """Find where the last `max_lines` lines of mm[floor:end] begin.
     
-    return None
+    Walks backwards from the end with rfind, so only the tail of the file is
+    ever touched rather than indexing every line.
+    """
+    start = end
+    for _ in range(max_lines):
+        newline = mm.rfind(b'\n', floor, start - 1)
+        if newline < 0:
+            return floor
+        start = newline + 1
+    return start
 
-def find_session_boundary(lines: List[str]) -> Optional[int]:
-    """Find session start or clear command in transcript."""
-    for i, line in enumerate(reversed(lines)):
+def load_transcript_entries(project_root: Path, transcript_path: str) -> List[Optional[Dict[str, Any]]]:
+    """Parse the transcript, reusing entries cached by earlier hook runs.
+    
+    Transcripts are append-only, so the cache records how many bytes were
+    already parsed and only the tail written since then is decoded. The cache
+    also keeps the inode and the last bytes it parsed; a file that shrank, was
+    replaced, or was rewritten in place (even to a larger size, as
+    `claude-prune restore` does) no longer matches and is parsed from scratch.
+    Only the last MAX_LOOKBACK_ENTRIES lines are ever returned or cached, and
+    a cold start reads just that tail from the mapped file. Lines that fail to
+    parse are kept as None so indices still line up. A long-lived process (the
+    intent daemon) also keeps the cache in memory between calls.
+    """
+    import pickle
+    
+    cache_file = project_root / PARSE_CACHE_FILE
+    st = os.stat(transcript_path)
+    if st.st_size == 0:
+        return []
+    
+    entries = []
+    offset = 0
+    fingerprint = b''
+    cache = _parse_cache_memo.get(cache_file)
+    try:
+        if cache is None:
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        if cache['path'] == transcript_path and cache['ino'] == st.st_ino:
+            if cache['size'] == st.st_size and cache['mtime_ns'] == st.st_mtime_ns:
+                return cache['entries']
+            if cache['size'] < st.st_size:
+                entries = list(cache['entries'])
+                offset = cache['size']
+                fingerprint = cache['fingerprint']
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError, KeyError, TypeError):
+        pass  # No cache, an unreadable one, or one written by an older version
+    
+    with open(transcript_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        size = len(mm)
+        if offset and mm[max(0, offset - len(fingerprint)):offset] != fingerprint:
+            # Same file, different contents before the offset: rewritten in place
+            entries = []
+            offset = 0
+        
+        start = _tail_start(mm, offset, size, MAX_LOOKBACK_ENTRIES)
+        if start > offset:
+            # More new lines than we would ever scan; the cached ones are too old to matter
+            entries = []
+        
+        # Only complete lines go into the cache; a partially written last line
+        # is still parsed for this run but re-read next time
+        complete = mm.rfind(b'\n', start, size) + 1 or start
+        for line in mm[start:complete].splitlines():
+            entries.append(_parse_entry(line))
+        entries = entries[-MAX_LOOKBACK_ENTRIES:]
+        partial = mm[complete:size]
+        fingerprint = mm[max(0, complete - PARSE_CACHE_FINGERPRINT_BYTES):complete]
+    finally:
+        mm.close()
+    
+    if complete > offset:
+        cache = {
+            'path': transcript_path,
+            'size': complete,
+            'mtime_ns': st.st_mtime_ns,
+            'ino': st.st_ino,
+            'fingerprint': fingerprint,
+            'entries': entries
+        }
+        _parse_cache_memo[cache_file] = cache
         try:
-            data = json.loads(line.strip())
-            
-            # Handle new format with nested message
-            message = data.get('message', data)  # Fallback to data for legacy
+            # Unique per process and per in-flight write (the daemon runs hooks in threads)
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{id(cache)}")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    
+    if partial:
+        entries = (entries + [_parse_entry(line) for line in partial.splitlines()])[-MAX_LOOKBACK_ENTRIES:]
+    return entries
+
+def _has_boundary_marker(data: Dict[str, Any]) -> bool:
+    """Check whether an assistant entry contains our boundary marker."""
+    # Handle new format with nested message
+    if 'message' in data and isinstance(data['message'], dict):
+        message = data['message']
+        if message.get('role') != 'assistant':
+            return False
+    # Legacy format compatibility
+    elif data.get('type') == 'assistant':
+        message = data
+    else:
+        return False
+    
+    content = message.get('content', [])
+    if isinstance(content, list):
+        for item in content:
+            if isinstance(item, dict) and item.get('type') == 'text':
+                if BOUNDARY_MARKER in item.get('text', ''):
+                    return True
+    return False
+
+def _is_commit_command(data: Dict[str, Any]) -> bool:
+    """Check whether an assistant entry runs `git commit -m`."""
+    message = data.get('message', data)  # Fallback to data for legacy
+    if message.get('role') == 'assistant' or data.get('type') == 'assistant':
+        content = message.get('content', [])
+        if isinstance(content, list):
+            for item in content:
+                if item.get('type') == 'tool_use' and item.get('name') == 'Bash':
+                    command = item.get('input', {}).get('command', '')
+                    if 'git commit' in command and '-m' in command:
+                        return True
+    return False
+
+def _is_commit_result(data: Optional[Dict[str, Any]]) -> bool:
+    """Check whether a tool result entry looks like a successful commit."""
+    if data is None:
+        return False
+    message = data.get('message', data)
+    if (message.get('role') == 'user' and
+        any('tool_result' in str(content) for content in message.get('content', []))):
+        result_content = message.get('content', [])
+        if isinstance(result_content, list):
+            for result_item in result_content:
+                if isinstance(result_item, dict) and result_item.get('type') == 'tool_result':
+                    result_text = str(result_item.get('content', ''))
+                    if '[' in result_text and ']' in result_text:
+                        return True
+    return False
+
+def _is_session_start(data: Dict[str, Any]) -> bool:
+    """Check whether a user entry is a session start or clear command."""
+    message = data.get('message', data)  # Fallback to data for legacy
+    if message.get('role') == 'user' or data.get('type') == 'human':
+        content = message.get('content', data.get('content', ''))
+        if isinstance(content, list) and content:
+            # Check first content item
+            first_item = content[0]
+            if isinstance(first_item, dict):
+                text = first_item.get('text', '')
+            else:
+                text = str(first_item)
             
-            # Look for session start indicators
-            if message.get('role') == 'user' or data.get('type') == 'human':
-                content = message.get('content', data.get('content', ''))
-                if isinstance(content, list) and content:
-                    # Check first content item
-                    first_item = content[0]
-                    if isinstance(first_item, dict):
-                        text = first_item.get('text', '')
-                    else:
-                        text = str(first_item)
-                    
-                    if text.strip() in ['/clear', '/start', '/reset']:
-                        return len(lines) - i - 1
-        except:
-            continue
-    return None
+            return text.strip() in ['/clear', '/start', '/reset']
+    return False
 
-def find_natural_boundary(lines: List[str]) -> Tuple[int, str]:
-    """Find the most appropriate boundary point in the transcript."""
-    # Priority order for boundaries
+def _scan_boundaries(entries: List[Optional[Dict[str, Any]]]) -> Optional[Tuple[int, str]]:
+    """Walk the transcript backwards once, checking every boundary kind.
     
-    # 1. Check for our own boundary marker
-    marker_idx = find_last_boundary_marker(lines)
-    if marker_idx is not None:
-        return marker_idx, "boundary_marker"
+    Scans at most MAX_LOOKBACK_ENTRIES entries. A boundary marker wins outright, so it
+    returns immediately; otherwise the most recent successful commit beats the
+    most recent session start.
+    """
+    commit_idx = None
+    session_idx = None
+    next_data = None  # Entry after the current one, for the commit lookahead
+    
+    for i in range(len(entries) - 1, -1, -1):
+        data = entries[i]
+        if data is None:
+            next_data = None
+            continue
+        
+        try:
+            # 1. Our own boundary marker
+            if _has_boundary_marker(data):
+                return i, "boundary_marker"
+            
+            # 2. Successful git commit (the command followed by its result)
+            if commit_idx is None and _is_commit_command(data) and _is_commit_result(next_data):
+                commit_idx = i
+            
+            # 3. Session boundaries
+            if session_idx is None and _is_session_start(data):
+                session_idx = i
+        except Exception:
+            pass
+        
+        next_data = data
     
-    # 2. Check for successful git commit
-    commit_idx = find_git_commit_boundary(lines)
     if commit_idx is not None:
         return commit_idx, "git_commit"
-    
-    # 3. Check for session boundaries
-    session_idx = find_session_boundary(lines)
     if session_idx is not None:
         return session_idx, "session_start"
+    return None
+
+def find_natural_boundary(entries: List[Optional[Dict[str, Any]]]) -> Tuple[int, str]:
+    """Find the most appropriate boundary point in the transcript.
+    
+    Only the last MAX_LOOKBACK_ENTRIES entries are scanned.
+    """
+    offset = max(0, len(entries) - MAX_LOOKBACK_ENTRIES)
     
-    # 4. Fallback to last 150 entries (increased for better context)
-    return max(0, len(lines) - 150), "fallback_last_150"
+    # Priority order: boundary marker, git commit, session start
+    boundary = _scan_boundaries(entries[offset:])
+    if boundary is not None:
+        return boundary[0] + offset, boundary[1]
+    
+    # Fallback to last 150 entries (increased for better context)
+    return max(0, len(entries) - 150), "fallback_last_150"
+
+ToolClassification = Tuple[str, Dict[str, Any], int, int]
+
+def _classify_task(tool_name: str, input_data: Dict[str, Any]) -> Optional[ToolClassification]:
+    """Task delegation - MOST IMPORTANT."""
+    subagent = input_data.get('subagent_type', 'unknown')
+    description = input_data.get('description', '')
+    prompt = input_data.get('prompt', '')[:200]  # First 200 chars
+    return 'task_delegation', {
+        'subagent': subagent,
+        'description': description,
+        'prompt': prompt
+    }, RELEVANCE_SCORES['task_delegation'], len(subagent) + len(description) + len(prompt) + 48
+
+def _classify_file_operation(tool_name: str, input_data: Dict[str, Any]) -> Optional[ToolClassification]:
+    """File operations - just paths, not content."""
+    file_path = input_data.get('file_path', '') or input_data.get('notebook_path', '')
+    if file_path:
+        return 'file_operation', {
+            'action': tool_name.lower(),
+            'file': file_path
+        }, RELEVANCE_SCORES['file_operation'], len(file_path) + len(tool_name) + 26
+    return None
+
+def _classify_todo(tool_name: str, input_data: Dict[str, Any]) -> Optional[ToolClassification]:
+    """Todo management."""
+    todos = input_data.get('todos', [])
+    todo_count = len(todos)
+    return 'todo_management', {
+        'action': 'todo_update',
+        'count': todo_count
+    }, RELEVANCE_SCORES['todo_management'], 40
+
+def _classify_bash(tool_name: str, input_data: Dict[str, Any]) -> Optional[ToolClassification]:
+    """Git commands."""
+    command = input_data.get('command', '')
+    if 'git' in command:
+        # Sanitize command (remove sensitive data)
+        clean_cmd = COMMIT_MESSAGE_PATTERN.sub('-m "[message]"', command)[:100]
+        return 'git_command', {'command': clean_cmd}, RELEVANCE_SCORES['git_command'], len(clean_cmd) + 17
+    return None
+
+def _classify_verbose_tool(tool_name: str, input_data: Dict[str, Any]) -> Optional[ToolClassification]:
+    """Skip verbose tools - these often have verbose output we don't need."""
+    return 'verbose_output', {}, RELEVANCE_SCORES['verbose_output'], 2
+
+# Entry types (after mapping 'user' to 'human') that classify_content looks inside
+CLASSIFIED_ENTRY_TYPES = frozenset({'human', 'assistant', 'tool_result'})
+
+FILE_TOOLS = frozenset({'Write', 'Edit', 'MultiEdit', 'NotebookEdit'})
+VERBOSE_TOOLS = frozenset({'Read', 'Grep', 'WebFetch', 'WebSearch'})
+
+# Tool name -> classifier, so each tool_use costs one dict lookup
+TOOL_CLASSIFIERS = {
+    'Task': _classify_task,
+    'TodoWrite': _classify_todo,
+    'Bash': _classify_bash,
+    **{name: _classify_file_operation for name in FILE_TOOLS},
+    **{name: _classify_verbose_tool for name in VERBOSE_TOOLS},
+}
 
-def classify_content(data: Dict[str, Any]) -> Tuple[str, Dict[str, Any], int]:
-    """Classify and extract relevant content from a transcript entry."""
+def classify_content(data: Dict[str, Any]) -> Tuple[str, Dict[str, Any], int, int]:
+    """Classify and extract relevant content from a transcript entry.
+    
+    Returns (content type, extracted data, relevance, approximate serialized
+    size in chars) so callers can budget tokens without re-encoding the data.
+    Parsed JSON only ever yields builtin lists and dicts, so exact type()
+    checks stand in for isinstance throughout.
+    """
     # Handle new transcript format where message is nested
-    if 'message' in data and isinstance(data['message'], dict):
+    if type(data.get('message')) is dict:
         message = data['message']
         entry_type = message.get('role', '')
         
@@ -191,96 +517,74 @@ def classify_content(data: Dict[str, Any]) -> Tuple[str, Dict[str, Any], int]:
         entry_type = data.get('type', '')
         message = data
     
+    # Cheap pre-filter: metadata entries never classify as anything
+    if entry_type not in CLASSIFIED_ENTRY_TYPES and 'toolResult' not in data:
+        return 'other', {}, 0, 2
+    
     if entry_type == 'human':
         # User prompts are high value
         content = message.get('content', '')
-        if isinstance(content, list) and content:
-            text = content[0].get('text', '') if isinstance(content[0], dict) else str(content[0])
+        if type(content) is list and content:
+            # Tool output comes back as a user turn; it is not a prompt
+            if type(content[0]) is dict and content[0].get('type') == 'tool_result':
+                return 'other', {}, 0, 2
+            text = content[0].get('text', '') if type(content[0]) is dict else str(content[0])
             # Truncate very long prompts but keep the essence
             if len(text) > 200:
                 text = text[:197] + "..."
-            return 'user_prompt', {'text': text}, RELEVANCE_SCORES['user_prompt']
+            return 'user_prompt', {'text': text}, RELEVANCE_SCORES['user_prompt'], len(text) + 12
     
     elif entry_type == 'assistant':
         content = message.get('content', [])
-        if isinstance(content, list):
+        if type(content) is list:
             for item in content:
-                if isinstance(item, dict):
+                if type(item) is dict:
+                    item_type = item.get('type')
+                    
                     # Tool use - extract key information
-                    if item.get('type') == 'tool_use':
+                    if item_type == 'tool_use':
                         tool_name = item.get('name', '')
-                        input_data = item.get('input', {})
-                        
-                        # Task delegation - MOST IMPORTANT
-                        if tool_name == 'Task':
-                            subagent = input_data.get('subagent_type', 'unknown')
-                            description = input_data.get('description', '')
-                            prompt = input_data.get('prompt', '')[:200]  # First 200 chars
-                            return 'task_delegation', {
-                                'subagent': subagent,
-                                'description': description,
-                                'prompt': prompt
-                            }, RELEVANCE_SCORES['task_delegation']
-                        
-                        # File operations - just paths, not content
-                        elif tool_name in ['Write', 'Edit', 'MultiEdit', 'NotebookEdit']:
-                            file_path = input_data.get('file_path', '') or input_data.get('notebook_path', '')
-                            if file_path:
-                                return 'file_operation', {
-                                    'action': tool_name.lower(),
-                                    'file': file_path
-                                }, RELEVANCE_SCORES['file_operation']
-                        
-                        # Todo management
-                        elif tool_name == 'TodoWrite':
-                            todos = input_data.get('todos', [])
-                            todo_count = len(todos)
-                            return 'todo_management', {
-                                'action': 'todo_update',
-                                'count': todo_count
-                            }, RELEVANCE_SCORES['todo_management']
-                        
-                        # Git commands
-                        elif tool_name == 'Bash':
-                            command = input_data.get('command', '')
-                            if 'git' in command:
-                                # Sanitize command (remove sensitive data)
-                                clean_cmd = re.sub(r'-m\s+"[^"]*"', '-m "[message]"', command)
-                                return 'git_command', {'command': clean_cmd[:100]}, RELEVANCE_SCORES['git_command']
-                        
-                        # Skip verbose tools
-                        elif tool_name in ['Read', 'Grep', 'WebFetch', 'WebSearch']:
-                            # These often have verbose output we don't need
-                            return 'verbose_output', {}, RELEVANCE_SCORES['verbose_output']
+                        classifier = TOOL_CLASSIFIERS.get(tool_name)
+                        if classifier:
+                            result = classifier(tool_name, item.get('input', {}))
+                            if result:
+                                return result
                     
                     # Text responses - look for key information
-                    elif item.get('type') == 'text':
+                    elif item_type == 'text':
                         text = item.get('text', '')
                         
                         # Skip acknowledgments
-                        if len(text) < 50 and any(word in text.lower() for word in ['sure', 'ok', 'will', 'let me']):
-                            return 'acknowledgment', {}, RELEVANCE_SCORES['acknowledgment']
+                        if len(text) < 50 and ACKNOWLEDGMENT_PATTERN.search(text):
+                            return 'acknowledgment', {}, RELEVANCE_SCORES['acknowledgment'], 2
                         
                         # Extract decisions and summaries
-                        if any(keyword in text.lower() for keyword in ['decided', 'conclusion', 'summary', 'completed', 'finished', 'implemented']):
+                        if SUMMARY_PATTERN.search(text):
                             # Extract first sentence or 150 chars
                             summary = text.split('.')[0] if '.' in text else text[:150]
-                            return 'summary', {'text': summary}, RELEVANCE_SCORES['summary']
+                            return 'summary', {'text': summary}, RELEVANCE_SCORES['summary'], len(summary) + 12
     
     elif entry_type == 'tool_result' or 'toolResult' in data:
         # Handle tool results (might be in data directly for new format)
         tool_result = data.get('toolResult') if 'toolResult' in data else message
         content = tool_result.get('content', '') if tool_result else ''
-        if isinstance(content, list) and content:
-            result_text = str(content[0])
-            if 'error' in result_text.lower() or 'failed' in result_text.lower():
+        if type(content) is list and content:
+            raw = content[0]
+            if type(raw) is str:
+                text = raw
+            elif type(raw) is dict:
+                text = raw.get('text', '')
+            else:
+                text = ''
+            head = text[:ERROR_SCAN_CHARS].lower() if type(text) is str else ''
+            if 'error' in head or 'failed' in head:
                 # Keep first line of error
-                error_line = result_text.split('\n')[0][:100]
-                return 'error', {'message': error_line}, RELEVANCE_SCORES['error']
+                error_line = text[:ERROR_SCAN_CHARS].split('\n', 1)[0][:100]
+                return 'error', {'message': error_line}, RELEVANCE_SCORES['error'], len(error_line) + 15
     
-    return 'other', {}, 0
+    return 'other', {}, 0, 2
 
-def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[str, Any]]:
+def extract_intelligent_context(entries: List[Optional[Dict[str, Any]]], start_idx: int) -> List[Dict[str, Any]]:
     """Extract and prioritize relevant context from transcript."""
     context_items = []
     seen_files = set()
@@ -288,10 +592,11 @@ def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[s
     total_tokens = 0
     
     # Process from boundary forward
-    for line in lines[start_idx:]:
+    for data in entries[start_idx:]:
+        if data is None:
+            continue
         try:
-            data = json.loads(line.strip())
-            content_type, extracted, relevance = classify_content(data)
+            content_type, extracted, relevance, approx_chars = classify_content(data)
             
             # Skip irrelevant content
             if relevance < 2:
@@ -305,14 +610,15 @@ def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[s
                 seen_files.add(file_path)
             
             elif content_type == 'user_prompt':
-                prompt_hash = hashlib.md5(extracted.get('text', '').encode()).hexdigest()[:8]
+                # Built-in hash is enough for a set that lives within this run
+                prompt_hash = hash(extracted.get('text', ''))
                 if prompt_hash in seen_prompts:
                     continue
                 seen_prompts.add(prompt_hash)
             
             # Estimate tokens (more accurate: 1 token ≈ 3.5 chars for JSON)
             # JSON has more punctuation, so slightly fewer chars per token
-            item_tokens = int(len(json.dumps(extracted)) / 3.5)
+            item_tokens = approx_chars * 2 // 7
             
             # Stop if we're approaching token limit
             if total_tokens + item_tokens > TARGET_CONTEXT_TOKENS:
@@ -321,7 +627,8 @@ def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[s
                     context_items.append({
                         'type': content_type,
                         'data': extracted,
-                        'relevance': relevance
+                        'relevance': relevance,
+                        'tokens': item_tokens
                     })
                     total_tokens += item_tokens
                 break
@@ -329,7 +636,8 @@ def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[s
             context_items.append({
                 'type': content_type,
                 'data': extracted,
-                'relevance': relevance
+                'relevance': relevance,
+                'tokens': item_tokens
             })
             total_tokens += item_tokens
             
@@ -343,44 +651,85 @@ def extract_intelligent_context(lines: List[str], start_idx: int) -> List[Dict[s
         trimmed_items = []
         current_tokens = 0
         for item in context_items:
-            item_tokens = int(len(json.dumps(item['data'])) / 3.5)
-            if current_tokens + item_tokens <= TARGET_CONTEXT_TOKENS:
+            if current_tokens + item['tokens'] <= TARGET_CONTEXT_TOKENS:
                 trimmed_items.append(item)
-                current_tokens += item_tokens
+                current_tokens += item['tokens']
         context_items = trimmed_items
     
     return context_items
 
-def get_git_changes_summary() -> Dict[str, Any]:
+def git_environment(env: Mapping[str, str]) -> Dict[str, str]:
+    """Minimal environment for git: no optional index lock writes, no locale lookups."""
+    git_env = {
+        'PATH': env.get('PATH', ''),
+        'HOME': env.get('HOME', ''),
+        'GIT_OPTIONAL_LOCKS': '0',
+        'LC_ALL': 'C'
+    }
+    if 'XDG_CONFIG_HOME' in env:
+        git_env['XDG_CONFIG_HOME'] = env['XDG_CONFIG_HOME']  # Second user-level config location
+    return git_env
+
+def has_git_changes(project_root: Path, git_env: Dict[str, str]) -> bool:
+    """Cheap check for any difference between the working tree and HEAD."""
+    import subprocess
+    
+    try:
+        return subprocess.call(
+            ["git", "diff", "--quiet", "HEAD", "--"],
+            cwd=project_root,
+            env=git_env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        ) != 0
+    except Exception:
+        return True  # Let the full summary decide
+
+def get_git_changes_summary(project_root: Path, git_env: Dict[str, str]) -> Dict[str, Any]:
     """Get a comprehensive summary of git changes."""
+    import subprocess
+    
     try:
-        # Get concise file change summary
-        name_status = subprocess.run(
-            ["git", "diff", "--name-status", "HEAD"],
-            capture_output=True,
-            text=True
+        # Start both diffs before waiting on either; they are independent
+        # Concise file change summary; -z leaves paths unquoted
+        name_status_proc = subprocess.Popen(
+            ["git", "diff", "--name-status", "-z", "HEAD", "--"],
+            cwd=project_root,
+            env=git_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
         )
         
-        # Get overall statistics
-        shortstat = subprocess.run(
-            ["git", "diff", "--shortstat", "HEAD"],
-            capture_output=True,
-            text=True
+        # Overall statistics
+        shortstat_proc = subprocess.Popen(
+            ["git", "diff", "--shortstat", "HEAD", "--"],
+            cwd=project_root,
+            env=git_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
         )
         
-        # Parse changes by type
+        name_status, _ = name_status_proc.communicate()
+        shortstat, _ = shortstat_proc.communicate()
+        
+        # Parse changes by type from "<status>\0<path>\0" records (two paths for
+        # renames and copies); only the paths we keep are decoded
         changes = {'added': [], 'modified': [], 'deleted': []}
-        if name_status.stdout:
-            for line in name_status.stdout.strip().split('\n'):
-                parts = line.split('\t')
-                if len(parts) == 2:
-                    status, file = parts
-                    if status == 'A':
-                        changes['added'].append(file)
-                    elif status == 'M':
-                        changes['modified'].append(file)
-                    elif status == 'D':
-                        changes['deleted'].append(file)
+        fields = name_status.split(b'\0')[:-1]
+        i = 0
+        while i < len(fields):
+            status = fields[i]
+            if status[:1] in (b'R', b'C'):
+                i += 3
+                continue
+            file = fields[i + 1].decode(errors='replace')  # Names only feed the message text
+            i += 2
+            if status == b'A':
+                changes['added'].append(file)
+            elif status == b'M':
+                changes['modified'].append(file)
+            elif status == b'D':
+                changes['deleted'].append(file)
         
         # Group by directory for pattern detection
         directories = {}
@@ -394,13 +743,25 @@ def get_git_changes_summary() -> Dict[str, Any]:
         
         return {
             'changes': changes,
-            'stats': shortstat.stdout.strip() if shortstat.stdout else "",
+            'stats': shortstat.decode().strip() if shortstat else "",
             'primary_directory': primary_dir,
             'total_files': sum(len(v) for v in changes.values())
         }
     except:
         return {'changes': {}, 'stats': '', 'primary_directory': None, 'total_files': 0}
 
+def _dedup(items: List[str], limit: Optional[int] = None) -> List[str]:
+    """Drop repeats while keeping first-seen order, stopping once `limit` are found."""
+    seen = set()
+    unique = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            unique.append(item)
+            if len(unique) == limit:
+                break
+    return unique
+
 def build_optimized_prompt(context_items: List[Dict], git_summary: Dict) -> str:
     """Build an optimized prompt for Claude with structured context."""
     sections = []
@@ -417,7 +778,7 @@ def build_optimized_prompt(context_items: List[Dict], git_summary: Dict) -> str:
     # Build structured context
     if user_prompts:
         # Deduplicate and prioritize recent
-        unique_prompts = list(dict.fromkeys(user_prompts))[-3:]
+        unique_prompts = _dedup(user_prompts)[-3:]
         sections.append("User requests:\n" + "\n".join(f"- {p}" for p in unique_prompts))
     
     # Task delegations are critical context
@@ -456,14 +817,14 @@ def build_optimized_prompt(context_items: List[Dict], git_summary: Dict) -> str:
         
         ops_summary = []
         for action, files in by_action.items():
-            unique_files = list(dict.fromkeys(files))[:5]
+            unique_files = _dedup(files, 5)
             ops_summary.append(f"{action.capitalize()}: {', '.join(unique_files)}")
         
         sections.append("File operations:\n" + "\n".join(ops_summary))
     
     # Work summaries
     if summaries:
-        unique_summaries = list(dict.fromkeys(summaries))[:2]
+        unique_summaries = _dedup(summaries, 2)
         sections.append("Work completed:\n" + "\n".join(f"- {s}" for s in unique_summaries))
     
     # Errors if any
@@ -490,57 +851,72 @@ Output ONLY the commit message, nothing else."""
 
     return prompt
 
-def call_claude_cli(prompt: str, timeout_seconds: int = 300) -> str:
-    """Call the correct Claude CLI binary with generous timeout."""
-    try:
-        # Try multiple possible Claude CLI locations in priority order
-        possible_paths = [
-            # Claude Code native binary locations
-            Path.home() / ".claude" / "local" / "claude",  # Claude Code default
-            Path.home() / ".claude" / "bin" / "claude",  # Alternative Claude Code location
-            
-            # npm global installations (user-specific)
-            Path.home() / ".npm-global" / "bin" / "claude",  # Recommended npm global
-            Path.home() / ".npm" / "bin" / "claude",  # Alternative npm location
-            Path.home() / "node_modules" / ".bin" / "claude",  # Local npm
-            
-            # yarn/pnpm global installations
-            Path.home() / ".yarn" / "bin" / "claude",  # Yarn global
-            Path.home() / ".local" / "share" / "pnpm" / "claude",  # pnpm global
-            
-            # System-wide installations
-            Path("/usr/local/bin/claude"),  # Common system install
-            Path("/usr/bin/claude"),  # System package manager
-            
-            # Homebrew installations
-            Path("/opt/homebrew/bin/claude"),  # Homebrew on Apple Silicon
-            Path("/usr/local/Cellar/node") / "*" / "bin" / "claude",  # Homebrew node
-            
-            # Windows WSL paths
-            Path("/mnt/c/Program Files/nodejs/claude"),  # Windows via WSL
-            Path.home() / "AppData" / "Roaming" / "npm" / "claude",  # Windows npm
-        ]
-        
-        # Find the first valid Claude binary
-        claude_path = None
-        for path in possible_paths:
-            # Handle glob patterns (for version-specific paths)
-            if "*" in str(path):
-                import glob
-                matches = glob.glob(str(path))
-                if matches and Path(matches[0]).exists():
-                    claude_path = Path(matches[0])
-                    break
-            elif path.exists() and path.is_file():
-                claude_path = path
+# Claude CLI binaries already found by this process, keyed by $PATH
+_claude_cli_memo: Dict[str, str] = {}
+
+def _search_claude_cli(search_path: str) -> Optional[str]:
+    """Scan the known install locations, then search_path, for a Claude binary."""
+    claude_path = _claude_cli_memo.get(search_path)
+    if claude_path is not None:
+        return claude_path
+    
+    for path in CLAUDE_CLI_CANDIDATES:
+        # Handle glob patterns (for version-specific paths)
+        if "*" in str(path):
+            import glob
+            matches = glob.glob(str(path))
+            if matches and Path(matches[0]).exists():
+                claude_path = matches[0]
                 break
-        
-        # If not found in known locations, try system PATH
-        if not claude_path:
-            claude_path = "claude"  # Fallback to PATH lookup
+        elif path.exists() and path.is_file():
+            claude_path = str(path)
+            break
+    else:
+        import shutil
+        claude_path = shutil.which('claude', path=search_path)
+        if claude_path is None:
+            return None  # Not memoized; the CLI may be installed while the daemon runs
+    
+    _claude_cli_memo[search_path] = claude_path
+    return claude_path
+
+def find_claude_cli(project_root: Optional[Path] = None, search_path: Optional[str] = None) -> str:
+    """Resolve the Claude CLI binary, reusing the path found by a previous run."""
+    cache_file = project_root / CLI_PATH_CACHE_FILE if project_root else None
+    if cache_file:
+        try:
+            cached_path = cache_file.read_text().strip()
+            if cached_path and os.access(cached_path, os.X_OK):
+                return cached_path
+        except OSError:
+            pass
+    
+    if search_path is None:
+        search_path = os.environ.get('PATH', '')
+    claude_path = _search_claude_cli(search_path)
+    if not claude_path:
+        return "claude"  # Fallback to PATH lookup
+    
+    if cache_file:
+        try:
+            cache_file.write_text(claude_path)
+        except OSError:
+            pass
+    return claude_path
+
+def call_claude_cli(prompt: str, timeout_seconds: int = 300, project_root: Optional[Path] = None,
+                    env: Optional[Mapping[str, str]] = None) -> str:
+    """Call the correct Claude CLI binary with generous timeout, in the hook's environment."""
+    import subprocess
+    
+    env = os.environ if env is None else env
+    try:
+        claude_path = find_claude_cli(project_root, env.get('PATH', ''))
         
         result = subprocess.run(
-            [str(claude_path), "-p", prompt, "--model", HAIKU_MODEL],
+            [claude_path, "-p", prompt, "--model", HAIKU_MODEL],
+            cwd=project_root,
+            env=env,
             capture_output=True,
             text=True,
             timeout=timeout_seconds  # Very generous timeout
@@ -562,7 +938,7 @@ def call_claude_cli(prompt: str, timeout_seconds: int = 300) -> str:
     except subprocess.TimeoutExpired:
         # If 300s timeout fails, try once more with 600s
         if timeout_seconds == 300:
-            return call_claude_cli(prompt, timeout_seconds=600)
+            return call_claude_cli(prompt, timeout_seconds=600, project_root=project_root, env=env)
     except Exception:
         pass  # Fail silently and fall back to smart generation
     
@@ -609,109 +985,154 @@ def generate_smart_fallback(prompt: str) -> str:
     # Default fallback
     return "chore: Update project files"
 
-def call_claude_for_intent(prompt: str) -> str:
+def call_claude_for_intent(prompt: str, project_root: Optional[Path] = None,
+                           env: Optional[Mapping[str, str]] = None) -> str:
     """Generate a commit message using Claude CLI or smart fallback."""
     
     # Try Claude CLI first
-    claude_message = call_claude_cli(prompt)
+    claude_message = call_claude_cli(prompt, project_root=project_root, env=env)
     if claude_message:
         return claude_message
     
     # Fallback to smart generation
     return generate_smart_fallback(prompt)
 
+def context_digest(prompt: str) -> str:
+    """Hash the prompt for deduplication across hook runs."""
+    # xxhash is a much cheaper digest; hashlib covers its absence
+    try:
+        import xxhash
+    except ImportError:
+        import hashlib
+        return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    return xxhash.xxh3_128_hexdigest(prompt.encode())
+
 def should_update_intent(project_root: Path, context_hash: str) -> bool:
     """Check if we should update intent (rate limiting + deduplication)."""
     cache_file = project_root / INTENT_CACHE_FILE
     
-    if cache_file.exists():
+    try:
+        fd = os.open(cache_file, os.O_RDONLY)
         try:
-            cache_data = json.loads(cache_file.read_text())
-            last_update = cache_data.get('last_update', 0)
-            last_hash = cache_data.get('context_hash', '')
-            current_time = datetime.now().timestamp()
-            
-            # Skip if same context
-            if last_hash == context_hash:
-                return False
-            
-            # Rate limit
-            if current_time - last_update < CACHE_DURATION_SECONDS:
-                return False
-        except:
-            pass
+            record = os.read(fd, 64)  # Anything longer than a record is an old JSON cache
+        finally:
+            os.close(fd)
+        last_update, last_hash = CACHE_RECORD.unpack(record)
+    except (OSError, struct.error):
+        return True  # No cache yet, or one in the old JSON format
+    
+    # Skip if same context
+    if last_hash == bytes.fromhex(context_hash):
+        return False
+    
+    # Rate limit
+    if time.time() - last_update < CACHE_DURATION_SECONDS:
+        return False
     
     return True
 
 def update_intent_cache(project_root: Path, context_hash: str):
     """Update cache with hash for deduplication."""
     cache_file = project_root / INTENT_CACHE_FILE
-    cache_data = {
-        'last_update': datetime.now().timestamp(),
-        'context_hash': context_hash
-    }
-    cache_file.write_text(json.dumps(cache_data))
+    record = CACHE_RECORD.pack(time.time(), bytes.fromhex(context_hash))
+    
+    # Write a temp file and rename it over the cache, so readers never see a torn record
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{id(record)}")
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, record)
+    finally:
+        os.close(fd)
+    os.replace(tmp_file, cache_file)
 
 def inject_boundary_marker(intent: str = None):
     """Output a boundary marker that will appear in the transcript."""
+    from datetime import datetime
+    
     # This will be captured in the transcript for future boundary detection
+    marker = f"{BOUNDARY_MARKER} {datetime.now().isoformat()}"
     if intent:
-        print(f"{BOUNDARY_MARKER} {datetime.now().isoformat()} | {intent}")
-    else:
-        print(f"{BOUNDARY_MARKER} {datetime.now().isoformat()}")
-    sys.stdout.flush()
+        marker += f" | {intent}"
+    # One unbuffered write; nothing else goes to stdout, so no flush is needed
+    os.write(sys.stdout.fileno(), f"{marker}\n".encode())
 
-def main():
-    """Main hook handler."""
+def append_log(log_file: Path, line: str):
+    """Append one line to a log file with a single write() call."""
+    fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+def log_hook_error(error: Exception):
+    """Append an error to the shared hook error log."""
+    from datetime import datetime
+    
+    error_log = Path.home() / ".claude" / "hook-errors.log"
+    error_log.parent.mkdir(exist_ok=True)
+    append_log(error_log, f"{datetime.now()}: Advanced intent tracker error: {str(error)}\n")
+
+def run_hook(input_data: Dict[str, Any], cwd: Optional[str] = None,
+             env: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """Handle one hook event and return the new intent, if one was generated.
+    
+    Runs either in the hook process itself or inside the intent daemon, so it
+    never touches stdout or exits; `cwd` and `env` are the directory and
+    environment the hook fired in (git and the Claude CLI run with the latter).
+    """
+    env = os.environ if env is None else env
     try:
-        input_data = json.load(sys.stdin)
         hook_event = input_data.get("hook_event_name", "")
         
         if hook_event not in ["Stop", "SubagentStop"]:
-            sys.exit(0)
+            return None
         
-        project_root = get_project_root()
+        project_root = get_project_root(cwd)
         git_dir = project_root / ".git"
         
         if not git_dir.exists():
-            sys.exit(0)
+            return None
+        
+        # Nothing to commit means no intent to record; skip the transcript entirely
+        git_env = git_environment(env)
+        if not has_git_changes(project_root, git_env):
+            return None
         
         transcript_path = input_data.get("transcript_path", "")
         if not transcript_path or not Path(transcript_path).exists():
-            sys.exit(0)
+            return None
         
-        # Read transcript
-        with open(transcript_path, 'r') as f:
-            lines = f.readlines()
+        # Parse transcript (incrementally, via the parse cache)
+        entries = load_transcript_entries(project_root, transcript_path)
         
-        if len(lines) < 5:  # Too short to analyze
-            sys.exit(0)
+        if len(entries) < 5:  # Too short to analyze
+            return None
         
         # Find the best boundary point
-        boundary_idx, boundary_type = find_natural_boundary(lines)
+        boundary_idx, boundary_type = find_natural_boundary(entries)
         
         # Extract intelligent context from boundary forward
-        context_items = extract_intelligent_context(lines, boundary_idx)
+        context_items = extract_intelligent_context(entries, boundary_idx)
         
         # Get git changes
-        git_summary = get_git_changes_summary()
+        git_summary = get_git_changes_summary(project_root, git_env)
         
         # Skip if no changes and no meaningful context
         if git_summary['total_files'] == 0 and len(context_items) < 2:
-            sys.exit(0)
+            return None
         
         # Build optimized prompt
         prompt = build_optimized_prompt(context_items, git_summary)
         
         # Generate hash for deduplication
-        context_hash = hashlib.md5(prompt.encode()).hexdigest()
+        context_hash = context_digest(prompt)
         
         # Check if we should update
         if not should_update_intent(project_root, context_hash):
-            sys.exit(0)
+            return None
         
         # Call Claude for intent
-        intent = call_claude_for_intent(prompt)
+        intent = call_claude_for_intent(prompt, project_root, env)
         
         # Write intent
         intent_file = project_root / INTENT_FILE
@@ -720,22 +1141,120 @@ def main():
         # Update cache
         update_intent_cache(project_root, context_hash)
         
-        # Inject boundary marker for next time with the generated intent
-        inject_boundary_marker(intent)
-        
         # Log boundary detection for debugging
-        debug_log = project_root / ".git" / "intent_debug.log"
-        with open(debug_log, 'a') as f:
-            f.write(f"{datetime.now()}: Boundary type: {boundary_type}, Index: {boundary_idx}/{len(lines)}, Context items: {len(context_items)}, Git files: {git_summary['total_files']}, Intent: {intent}\n")
+        if env.get('CLAUDE_DEBUG', '').lower() == 'true':
+            from datetime import datetime
+            debug_log = project_root / ".git" / "intent_debug.log"
+            append_log(debug_log, f"{datetime.now()}: Boundary type: {boundary_type}, Index: {boundary_idx}/{len(entries)}, Context items: {len(context_items)}, Git files: {git_summary['total_files']}, Intent: {intent}\n")
+        
+        return intent
+        
+    except Exception as e:
+        log_hook_error(e)
+        return None
+
+def start_daemon() -> bool:
+    """Launch the intent daemon in the background; False if it can't be started."""
+    if os.environ.get('CLAUDE_INTENT_DAEMON', '').lower() in ('0', 'false') or not DAEMON_SCRIPT.exists():
+        return False
+    
+    import subprocess
+    
+    try:
+        # Own session and no inherited stdio, so it outlives this hook without holding its pipes
+        subprocess.Popen(
+            [sys.executable, str(DAEMON_SCRIPT)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        return True
+    except OSError:
+        return False
+
+def _open_daemon_socket() -> Optional[Any]:
+    """Connect to the daemon's socket once; None if nothing is listening."""
+    import socket
+    
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        return None  # No UNIX sockets on this platform
+    try:
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT_SECONDS)
+        sock.connect(str(DAEMON_SOCKET))
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+def connect_to_daemon() -> Optional[Any]:
+    """Return a socket connected to the intent daemon, starting the daemon if needed."""
+    import socket
+    
+    sock = _open_daemon_socket()
+    if sock is not None or not hasattr(socket, 'AF_UNIX') or not start_daemon():
+        return sock
+    
+    # Give the new daemon a moment to bind its socket
+    deadline = time.monotonic() + DAEMON_STARTUP_WAIT_SECONDS
+    while sock is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+        sock = _open_daemon_socket()
+    return sock
+
+def request_intent_from_daemon(input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Hand the hook event to the intent daemon.
+    
+    Returns the daemon's response, or None when no daemon could be reached (or
+    it was loaded from older hook code and turned the event away) so the caller
+    can fall back to handling the event in-process.
+    """
+    sock = connect_to_daemon()
+    if sock is None:
+        return None
+    
+    # The daemon has the event now; a failure past this point must not
+    # make us run it a second time in-process
+    try:
+        sock.settimeout(DAEMON_RESPONSE_TIMEOUT_SECONDS)
+        # The daemon serves every session; send ours so git and the CLI run as they would here
+        request = {'cwd': os.getcwd(), 'env': dict(os.environ), 'input': input_data}
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        response = sock.makefile('rb').readline()
+        response = json.loads(response) if response else {}
+        return None if response.get('outdated') else response
+    except (OSError, ValueError):
+        return {}
+    finally:
+        sock.close()
+
+def main():
+    """Main hook handler."""
+    try:
+        input_data = json.loads(sys.stdin.buffer.read())
+        hook_event = input_data.get("hook_event_name", "")
+        
+        if hook_event not in ["Stop", "SubagentStop"]:
+            sys.exit(0)
+        
+        # Prefer the warm daemon; handle the event here if it isn't running
+        response = request_intent_from_daemon(input_data)
+        if response is None:
+            intent = run_hook(input_data)
+        else:
+            intent = response.get('intent')
+        
+        # Inject boundary marker for next time with the generated intent
+        if intent:
+            inject_boundary_marker(intent)
         
         sys.exit(0)
         
     except Exception as e:
-        error_log = Path.home() / ".claude" / "hook-errors.log"
-        error_log.parent.mkdir(exist_ok=True)
-        with open(error_log, 'a') as f:
-            f.write(f"{datetime.now()}: Advanced intent tracker error: {str(e)}\n")
+        log_hook_error(e)
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
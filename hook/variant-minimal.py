@@ -8,10 +8,13 @@ Zero external dependencies, maximum performance.
 import json
 import sys
 import os
+import time
 import subprocess
 import hashlib
+import struct
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
+from itertools import chain, islice
 import re
 from typing import Dict, List, Optional, Tuple, Any
 
@@ -19,78 +22,102 @@ from typing import Dict, List, Optional, Tuple, Any
 INTENT_FILE = ".git/CLAUDE_INTENT"
 INTENT_CACHE_FILE = ".git/CLAUDE_INTENT_CACHE_MINIMAL"
 CACHE_DURATION_SECONDS = 10  # Shorter cache for minimal version
+CACHE_RECORD = struct.Struct('<d16s')  # Cache file: last update time, 16-byte git state hash
+GIT_ENV = dict(os.environ, GIT_OPTIONAL_LOCKS='0')  # Don't take index.lock for a read-only diff
+
+# Compiled once rather than on every extract_component_name call
+COMPONENT_SUFFIX_PATTERN = re.compile(r'[_\-\.]?(test|spec|impl|controller|service|component|module)$', re.IGNORECASE)
+GENERIC_COMPONENT_NAMES = frozenset({'index', 'main', 'app', 'init'})
+
+# File classes for detect_change_type
+DOC_EXTENSIONS = frozenset({'.md', '.rst', '.txt'})
+CONFIG_EXTENSIONS = frozenset({'.json', '.yml', '.yaml', '.toml', '.ini', '.cfg'})
+STYLE_EXTENSIONS = frozenset({'.css', '.scss', '.sass', '.less'})
+BUILD_FILES = frozenset({'package.json', 'requirements.txt', 'Cargo.toml', 'go.mod', 'pom.xml'})
 
 def get_project_root() -> Path:
     """Find the git project root from current directory."""
-    cwd = Path(os.getcwd())
-    for parent in [cwd] + list(cwd.parents):
-        if (parent / ".git").exists():
-            return parent
-    return cwd
+    # When git itself launched us, GIT_DIR already names the repository
+    git_dir = os.environ.get('GIT_DIR')
+    if git_dir and os.path.basename(os.path.normpath(git_dir)) == '.git':
+        return Path(os.path.dirname(os.path.abspath(git_dir)))
+    
+    # Walk up with plain string paths; one stat per level
+    cwd = os.getcwd()
+    path = cwd
+    while True:
+        if os.path.exists(os.path.join(path, '.git')):
+            return Path(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            return Path(cwd)
+        path = parent
 
 def get_git_changes() -> Dict[str, Any]:
     """Get detailed git changes with pattern analysis."""
     try:
-        # Get file changes
-        name_status = subprocess.run(
-            ["git", "diff", "--name-status", "HEAD"],
-            capture_output=True,
-            text=True,
-            timeout=5
+        # Get file changes and per-file line counts in one call; -z leaves paths unquoted
+        diff = subprocess.run(
+            ["git", "diff", "--raw", "--numstat", "-z", "HEAD", "--"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=5,
+            env=GIT_ENV
         )
         
-        # Get statistics
-        shortstat = subprocess.run(
-            ["git", "diff", "--shortstat", "HEAD"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        # Parse changes
+        # Parse changes and statistics in one pass over the NUL-separated fields:
+        #   raw records     ":<modes> <hashes> <status>\0<path>\0"
+        #   numstat records "<added>\t<deleted>\t<path>\0"
+        # Renames and copies carry two paths; numstat then leaves its own path
+        # empty and appends "<old>\0<new>\0". Binary files count as "-\t-".
         changes = {'added': [], 'modified': [], 'deleted': []}
-        if name_status.stdout:
-            for line in name_status.stdout.strip().split('\n'):
-                if not line:
+        stats = {'additions': 0, 'deletions': 0}
+        fields = diff.stdout.split(b'\0')[:-1]
+        i = 0
+        while i < len(fields):
+            field = fields[i]
+            if field[:1] == b':':
+                status = field.rsplit(b' ', 1)[-1]
+                if status[:1] in (b'R', b'C'):
+                    i += 3
                     continue
-                parts = line.split('\t')
-                if len(parts) == 2:
-                    status, file = parts
-                    if status == 'A':
-                        changes['added'].append(file)
-                    elif status == 'M':
-                        changes['modified'].append(file)
-                    elif status == 'D':
-                        changes['deleted'].append(file)
+                file = fields[i + 1].decode(errors='replace')  # Names only feed the message text
+                i += 2
+                if status == b'A':
+                    changes['added'].append(file)
+                elif status == b'M':
+                    changes['modified'].append(file)
+                elif status == b'D':
+                    changes['deleted'].append(file)
+            else:
+                added, deleted, path = field.split(b'\t', 2)
+                if added != b'-':
+                    stats['additions'] += int(added)
+                    stats['deletions'] += int(deleted)
+                i += 1 if path else 3
         
         # Analyze patterns
-        file_types = {}
-        directories = {}
+        file_types = Counter()
+        directories = Counter()
         
         for file_list in changes.values():
             for file in file_list:
-                # File type analysis
-                ext = Path(file).suffix.lower()
-                file_types[ext] = file_types.get(ext, 0) + 1
+                # git paths are always '/'-separated and relative, so plain string
+                # slicing gives the same answers as Path(file).suffix and dirname
+                slash = file.rfind('/')
+                
+                # File type analysis (like Path.suffix, a leading or trailing dot isn't one)
+                dot = file.rfind('.', slash + 2)
+                ext = file[dot:].lower() if 0 < dot < len(file) - 1 else ''
+                file_types[ext] += 1
                 
                 # Directory analysis
-                dir_name = os.path.dirname(file) or 'root'
-                directories[dir_name] = directories.get(dir_name, 0) + 1
-        
-        # Find primary patterns
-        primary_ext = max(file_types.items(), key=lambda x: x[1])[0] if file_types else None
-        primary_dir = max(directories.items(), key=lambda x: x[1])[0] if directories else None
+                dir_name = file[:slash] if slash > 0 else 'root'
+                directories[dir_name] += 1
         
-        # Parse statistics
-        stats = {'additions': 0, 'deletions': 0}
-        if shortstat.stdout:
-            # Extract numbers from format: "3 files changed, 45 insertions(+), 12 deletions(-)"
-            additions_match = re.search(r'(\d+) insertion', shortstat.stdout)
-            deletions_match = re.search(r'(\d+) deletion', shortstat.stdout)
-            if additions_match:
-                stats['additions'] = int(additions_match.group(1))
-            if deletions_match:
-                stats['deletions'] = int(deletions_match.group(1))
+        # Find primary patterns (ties go to the first one seen)
+        primary_ext = file_types.most_common(1)[0][0] if file_types else None
+        primary_dir = directories.most_common(1)[0][0] if directories else None
         
         return {
             'changes': changes,
@@ -120,31 +147,34 @@ def detect_change_type(git_data: Dict[str, Any]) -> str:
     primary_ext = git_data.get('primary_extension', '')
     primary_dir = git_data.get('primary_directory', '')
     
-    # Test files
-    if any('test' in f.lower() or 'spec' in f.lower() 
-           for f in changes['added'] + changes['modified']):
-        return 'test'
+    # One pass over added and modified files: test files win outright, CI
+    # files only after the docs and config checks below
+    has_ci = False
+    for f in chain(changes['added'], changes['modified']):
+        lower = f.lower()
+        if 'test' in lower or 'spec' in lower:
+            return 'test'
+        if not has_ci and ('.github' in f or '.gitlab' in f or 'ci' in lower):
+            has_ci = True
     
     # Documentation
-    if primary_ext in ['.md', '.rst', '.txt'] or 'docs' in primary_dir.lower():
+    if primary_ext in DOC_EXTENSIONS or 'docs' in primary_dir.lower():
         return 'docs'
     
     # Configuration
-    if primary_ext in ['.json', '.yml', '.yaml', '.toml', '.ini', '.cfg']:
+    if primary_ext in CONFIG_EXTENSIONS:
         return 'chore'
     
     # CI/CD
-    if any('.github' in f or '.gitlab' in f or 'ci' in f.lower() 
-           for f in changes['added'] + changes['modified']):
+    if has_ci:
         return 'ci'
     
     # Build files
-    if any(f in ['package.json', 'requirements.txt', 'Cargo.toml', 'go.mod', 'pom.xml']
-           for files in changes.values() for f in files):
+    if not BUILD_FILES.isdisjoint(chain.from_iterable(changes.values())):
         return 'build'
     
     # Style files
-    if primary_ext in ['.css', '.scss', '.sass', '.less']:
+    if primary_ext in STYLE_EXTENSIONS:
         return 'style'
     
     # Performance optimization (heuristic based on deletions > additions)
@@ -173,14 +203,15 @@ def extract_component_name(files: List[str]) -> Optional[str]:
         return None
     
     # Try to find common patterns
-    for file in files[:3]:  # Check first 3 files
-        path = Path(file)
-        
-        # Remove extension and common suffixes
-        name = path.stem
-        name = re.sub(r'[_\-\.]?(test|spec|impl|controller|service|component|module)$', '', name, flags=re.IGNORECASE)
+    for file in islice(files, 3):  # Check first 3 files
+        # Remove extension (as Path.stem would) and common suffixes
+        name = file[file.rfind('/') + 1:]
+        dot = name.rfind('.')
+        if 0 < dot < len(name) - 1:
+            name = name[:dot]
+        name = COMPONENT_SUFFIX_PATTERN.sub('', name)
         
-        if name and name not in ['index', 'main', 'app', 'init']:
+        if name and name not in GENERIC_COMPONENT_NAMES:
             return name
     
     # Fall back to directory name
@@ -251,42 +282,77 @@ def generate_minimal_intent(git_data: Dict[str, Any]) -> str:
     
     return f"{change_type}: Update project files"
 
-def should_update_intent(project_root: Path, git_hash: str) -> bool:
-    """Check if we should update intent based on cache."""
+def git_state_hash(git_data: Dict[str, Any]) -> str:
+    """Hash the changed files and line counts; everything else in git_data derives from them."""
+    h = hashlib.blake2b(digest_size=16)
+    for kind in ('added', 'modified', 'deleted'):
+        files = git_data['changes'][kind]
+        h.update(f"{kind}\0{len(files)}\0".encode())  # The count keeps a file name from reading as a kind
+        for file in sorted(files):
+            h.update(file.encode() + b'\0')
+    stats = git_data['stats']
+    h.update(f"{stats['additions']}\0{stats['deletions']}".encode())
+    return h.hexdigest()
+
+def read_cache(project_root: Path) -> Optional[Tuple[float, bytes]]:
+    """Return the cached (last update time, git state digest), or None without a usable cache."""
     cache_file = project_root / INTENT_CACHE_FILE
     
-    if cache_file.exists():
+    try:
+        fd = os.open(cache_file, os.O_RDONLY)
         try:
-            cache_data = json.loads(cache_file.read_text())
-            last_hash = cache_data.get('git_hash', '')
-            last_update = cache_data.get('last_update', 0)
-            current_time = datetime.now().timestamp()
-            
-            # Skip if same changes
-            if last_hash == git_hash:
-                return False
-            
-            # Rate limit
-            if current_time - last_update < CACHE_DURATION_SECONDS:
-                return False
-        except:
-            pass
+            record = os.read(fd, 64)  # Anything longer than a record is an old JSON cache
+        finally:
+            os.close(fd)
+        return CACHE_RECORD.unpack(record)
+    except (OSError, struct.error):
+        return None
+
+def is_rate_limited(cache: Optional[Tuple[float, bytes]]) -> bool:
+    """True while the last update is younger than CACHE_DURATION_SECONDS."""
+    return cache is not None and time.time() - cache[0] < CACHE_DURATION_SECONDS
+
+def should_update_intent(cache: Optional[Tuple[float, bytes]], git_hash: str) -> bool:
+    """Check if we should update intent based on cache."""
+    if cache is None:
+        return True
+    
+    # Skip if same changes
+    if cache[1] == bytes.fromhex(git_hash):
+        return False
+    
+    # Rate limit
+    if is_rate_limited(cache):
+        return False
     
     return True
 
 def update_cache(project_root: Path, git_hash: str):
     """Update cache with current git state."""
     cache_file = project_root / INTENT_CACHE_FILE
-    cache_data = {
-        'last_update': datetime.now().timestamp(),
-        'git_hash': git_hash
-    }
-    cache_file.write_text(json.dumps(cache_data))
+    record = CACHE_RECORD.pack(time.time(), bytes.fromhex(git_hash))
+    
+    # Write a temp file and rename it over the cache, so readers never see a torn record
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}")
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, record)
+    finally:
+        os.close(fd)
+    os.replace(tmp_file, cache_file)
+
+def append_log(log_file: Path, line: str):
+    """Append one line to a log file with a single write() call."""
+    fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
 
 def main():
     """Main handler for minimal intent tracking."""
     try:
-        input_data = json.load(sys.stdin)
+        input_data = json.loads(sys.stdin.buffer.read())  # Raw bytes; skips the text-mode decode
         hook_event = input_data.get("hook_event_name", "")
         
         # Support multiple hook events
@@ -299,6 +365,12 @@ def main():
         if not git_dir.exists():
             sys.exit(0)
         
+        # Nothing is written inside the rate-limit window whatever changed,
+        # so check it before running git at all
+        cache = read_cache(project_root)
+        if is_rate_limited(cache):
+            sys.exit(0)
+        
         # Get git changes
         git_data = get_git_changes()
         
@@ -307,12 +379,10 @@ def main():
             sys.exit(0)
         
         # Generate hash of current state
-        git_hash = hashlib.md5(
-            json.dumps(git_data, sort_keys=True).encode()
-        ).hexdigest()
+        git_hash = git_state_hash(git_data)
         
         # Check cache
-        if not should_update_intent(project_root, git_hash):
+        if not should_update_intent(cache, git_hash):
             sys.exit(0)
         
         # Generate intent
@@ -327,19 +397,19 @@ def main():
         
         # Optional: Log for debugging (minimal logging)
         if os.environ.get('CLAUDE_DEBUG', '').lower() == 'true':
+            from datetime import datetime
             debug_log = project_root / ".git" / "minimal_debug.log"
-            with open(debug_log, 'a') as f:
-                f.write(f"{datetime.now()}: Files: {git_data['total_files']}, Intent: {intent}\n")
+            append_log(debug_log, f"{datetime.now()}: Files: {git_data['total_files']}, Intent: {intent}\n")
         
         sys.exit(0)
         
     except Exception as e:
         # Silent failure - this is a minimal version
         if os.environ.get('CLAUDE_DEBUG', '').lower() == 'true':
+            from datetime import datetime
             error_log = Path.home() / ".claude" / "minimal-errors.log"
             error_log.parent.mkdir(exist_ok=True)
-            with open(error_log, 'a') as f:
-                f.write(f"{datetime.now()}: {str(e)}\n")
+            append_log(error_log, f"{datetime.now()}: {str(e)}\n")
         sys.exit(0)
 
 if __name__ == "__main__":